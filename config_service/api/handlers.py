@@ -2,22 +2,90 @@
 Обработчики бизнес-логики для API endpoints.
 """
 from twisted.internet import defer
+from twisted.logger import Logger
 from twisted.python import log
 from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import copy
+import hashlib
 import json
+import time
 
-from ..db import db_connection, ApiResponse
+from ..config import config
+from ..db import get_db_connection, ApiResponse, DATABASE_ERRORS
 from ..validation import config_validator
 from ..templates import template_processor
 
+_log = Logger()
 
-class ConfigurationHandler:
+
+# Максимальное число результатов валидации YAML в LRU-кэше
+VALIDATION_CACHE_SIZE = 2000
+
+# Ответ здорового сервиса не меняется - сериализуем его один раз
+_HEALTHY_DATA = {
+    'status': 'healthy',
+    'database': 'connected',
+    'service': 'config-service'
+}
+_HEALTHY_RESPONSE = ApiResponse(
+    data=_HEALTHY_DATA,
+    status_code=200,
+    raw_json=ApiResponse(data=_HEALTHY_DATA).to_json()
+)
+
+
+class BaseHandler:
+    """Базовый класс обработчиков с ленивым доступом к БД."""
+    
+    def __init__(self):
+        self._db = None
+    
+    @property
+    def db(self):
+        """Подключение к БД; пул создается при первом обращении."""
+        if self._db is None:
+            self._db = get_db_connection()
+        return self._db
+    
+    @db.setter
+    def db(self, value):
+        self._db = value
+
+
+class ConfigurationHandler(BaseHandler):
     """Обработчик операций с конфигурациями."""
     
     def __init__(self):
-        self.db = db_connection
+        super().__init__()
         self.validator = config_validator
         self.template_processor = template_processor
+        # blake2b(yaml_content) -> (is_valid, config_data, errors)
+        self._validation_cache: 'OrderedDict[bytes, Tuple[bool, Optional[Dict[str, Any]], list]]' = OrderedDict()
+    
+    @defer.inlineCallbacks
+    def _validate_cached(self, yaml_content: str) -> Tuple[bool, Optional[Dict[str, Any]], list]:
+        """
+        Валидирует YAML, кэшируя результат по хэшу содержимого.
+        
+        Повторная загрузка идентичного YAML (типично для CI/CD) обходится
+        без повторного парсинга. Возвращается копия конфигурации, чтобы
+        изменения в вызывающем коде не портили запись в кэше.
+        """
+        key = hashlib.blake2b(yaml_content.encode('utf-8'), digest_size=16).digest()
+        cached = self._validation_cache.get(key)
+        
+        if cached is None:
+            # Парсинг и проверка схемы - CPU-bound, выполняем вне reactor'а
+            cached = yield self.validator.validate_yaml_config_async(yaml_content)
+            self._validation_cache[key] = cached
+            if len(self._validation_cache) > VALIDATION_CACHE_SIZE:
+                self._validation_cache.popitem(last=False)
+        else:
+            self._validation_cache.move_to_end(key)
+        
+        is_valid, config_data, errors = cached
+        defer.returnValue((is_valid, copy.deepcopy(config_data), list(errors)))
     
     @defer.inlineCallbacks
     def create_configuration(self, service: str, yaml_content: str) -> ApiResponse:
@@ -33,10 +101,11 @@ class ConfigurationHandler:
         """
         try:
             # Валидируем YAML
-            is_valid, config_data, errors = self.validator.validate_yaml_config(yaml_content)
+            is_valid, config_data, errors = yield self._validate_cached(yaml_content)
             
             if not is_valid:
-                log.msg(f"Validation failed for service {service}: {errors}")
+                _log.info("Validation failed for service {service}: {errors}",
+                          service=service, errors=errors)
                 response = ApiResponse(
                     error=f"Validation errors: {'; '.join(errors)}",
                     status_code=422
@@ -56,7 +125,7 @@ class ConfigurationHandler:
             response = ApiResponse(data=response_data, status_code=201)
             defer.returnValue(response)
             
-        except Exception as e:
+        except DATABASE_ERRORS as e:
             log.err(f"Error creating configuration for {service}: {e}")
             response = ApiResponse(
                 error=f"Internal server error: {str(e)}",
@@ -64,10 +133,34 @@ class ConfigurationHandler:
             )
             defer.returnValue(response)
     
-    @defer.inlineCallbacks  
+    @staticmethod
+    def _not_found_response(service: str, version: Optional[int]) -> ApiResponse:
+        """Формирует ответ 404 для отсутствующей конфигурации."""
+        return ApiResponse(
+            error=f"Configuration not found for service '{service}'"
+                    + (f" version {version}" if version else ""),
+            status_code=404
+        )
+    
+    def _render_configuration(self, config_model,
+                              template_params: Optional[Dict[str, Any]]) -> ApiResponse:
+        """Применяет Jinja2 шаблонизацию к конфигурации и формирует ответ."""
+        try:
+            config_data = self.template_processor.process_template_request(
+                config_model.payload, template_params or {}
+            )
+        except ValueError as template_error:
+            log.err(f"Template processing error: {template_error}")
+            return ApiResponse(
+                error=f"Template processing failed: {str(template_error)}",
+                status_code=400
+            )
+        
+        return ApiResponse.ok(config_data)
+    
     def get_configuration(self, service: str, version: Optional[int] = None,
-                         use_template: bool = False, 
-                         template_params: Optional[Dict[str, Any]] = None) -> ApiResponse:
+                          use_template: bool = False, 
+                          template_params: Optional[Dict[str, Any]] = None) -> defer.Deferred:
         """
         Получает конфигурацию сервиса.
         
@@ -78,40 +171,58 @@ class ConfigurationHandler:
             template_params: Параметры для шаблона
             
         Returns:
-            ApiResponse с конфигурацией
+            Deferred с ApiResponse с конфигурацией
         """
+        d = self.get_configuration_sync(service, version, use_template, template_params)
+        if d is None:
+            d = self._get_configuration_slow(service, version, use_template, template_params)
+        return d
+    
+    def get_configuration_sync(self, service: str, version: Optional[int] = None,
+                               use_template: bool = False,
+                               template_params: Optional[Dict[str, Any]] = None) -> Optional[defer.Deferred]:
+        """
+        Быстрый путь: ответ из кэша чтения без генератора inlineCallbacks.
+        
+        Returns:
+            Уже сработавший Deferred с ApiResponse или None, если
+            конфигурации нет в кэше
+        """
+        if not use_template:
+            payload_json = self.db.get_cached_configuration(service, version, raw=True)
+            if payload_json is None:
+                return None
+            return defer.succeed(ApiResponse(raw_json=payload_json, status_code=200))
+        
+        config_model = self.db.get_cached_configuration(service, version)
+        if config_model is None:
+            return None
+        return defer.succeed(self._render_configuration(config_model, template_params))
+    
+    @defer.inlineCallbacks
+    def _get_configuration_slow(self, service: str, version: Optional[int],
+                                use_template: bool,
+                                template_params: Optional[Dict[str, Any]]) -> ApiResponse:
+        """Получает конфигурацию из БД (промах кэша чтения)."""
         try:
+            if not use_template:
+                # Без шаблонизации JSON из Postgres отдается клиенту как есть
+                payload_json = yield self.db.get_configuration_raw(service, version)
+                
+                if payload_json is None:
+                    defer.returnValue(self._not_found_response(service, version))
+                
+                defer.returnValue(ApiResponse(raw_json=payload_json, status_code=200))
+            
             # Получаем конфигурацию из БД
             config_model = yield self.db.get_configuration(service, version)
             
             if config_model is None:
-                response = ApiResponse(
-                    error=f"Configuration not found for service '{service}'"
-                            + (f" version {version}" if version else ""),
-                    status_code=404
-                )
-                defer.returnValue(response)
+                defer.returnValue(self._not_found_response(service, version))
             
-            config_data = config_model.payload
-            
-            # Применяем шаблонизацию если нужно
-            if use_template:
-                try:
-                    config_data = self.template_processor.process_template_request(
-                        config_data, template_params or {}
-                    )
-                except ValueError as template_error:
-                    log.err(f"Template processing error: {template_error}")
-                    response = ApiResponse(
-                        error=f"Template processing failed: {str(template_error)}",
-                        status_code=400
-                    )
-                    defer.returnValue(response)
-            
-            response = ApiResponse(data=config_data, status_code=200)
-            defer.returnValue(response)
+            defer.returnValue(self._render_configuration(config_model, template_params))
             
-        except Exception as e:
+        except DATABASE_ERRORS as e:
             log.err(f"Error getting configuration for {service}: {e}")
             response = ApiResponse(
                 error=f"Internal server error: {str(e)}",
@@ -131,22 +242,20 @@ class ConfigurationHandler:
             ApiResponse со списком версий
         """
         try:
-            history = yield self.db.get_configuration_history(service)
+            history_json = yield self.db.get_configuration_history_json(service)
             
-            if not history:
+            if history_json == '[]':
                 response = ApiResponse(
                     error=f"No configuration history found for service '{service}'",
                     status_code=404
                 )
                 defer.returnValue(response)
             
-            # Преобразуем в список словарей
-            history_data = [item.to_dict() for item in history]
-            
-            response = ApiResponse(data=history_data, status_code=200)
+            # JSON уже собран в Postgres - отдаем его без повторной сериализации
+            response = ApiResponse(raw_json=history_json.encode('utf-8'), status_code=200)
             defer.returnValue(response)
             
-        except Exception as e:
+        except DATABASE_ERRORS as e:
             log.err(f"Error getting history for {service}: {e}")
             response = ApiResponse(
                 error=f"Internal server error: {str(e)}",
@@ -155,29 +264,39 @@ class ConfigurationHandler:
             defer.returnValue(response)
 
 
-class HealthHandler:
+class HealthHandler(BaseHandler):
     """Обработчик для проверки работоспособности."""
     
     def __init__(self):
-        self.db = db_connection
+        super().__init__()
+        # До этого момента (time.monotonic) БД считается доступной без проверки
+        self._healthy_until: float = 0.0
+    
+    def check_health(self) -> defer.Deferred:
+        """
+        Проверяет работоспособность сервиса.
+        
+        Успешный результат кэшируется на HEALTH_CACHE_TTL секунд, чтобы
+        частые liveness-пробы не занимали соединения с БД. Ответ из кэша
+        отдается уже сработавшим Deferred без inlineCallbacks.
+        """
+        if time.monotonic() < self._healthy_until:
+            return defer.succeed(_HEALTHY_RESPONSE)
+        return self._check_health_slow()
     
     @defer.inlineCallbacks
-    def check_health(self) -> ApiResponse:
-        """Проверяет работоспособность сервиса."""
+    def _check_health_slow(self) -> ApiResponse:
+        """Проверяет доступность БД запросом SELECT 1."""
         try:
             # Проверяем подключение к БД
             yield self.db.dbpool.runQuery("SELECT 1")
             
-            health_data = {
-                'status': 'healthy',
-                'database': 'connected',
-                'service': 'config-service'
-            }
-            
-            response = ApiResponse(data=health_data, status_code=200)
-            defer.returnValue(response)
+            self._healthy_until = time.monotonic() + config.HEALTH_CACHE_TTL
+            defer.returnValue(_HEALTHY_RESPONSE)
             
         except Exception as e:
+            # Следующая проба снова пойдет в БД
+            self._healthy_until = 0.0
             log.err(f"Health check failed: {e}")
             health_data = {
                 'status': 'unhealthy', 
@@ -7,9 +7,46 @@ from twisted.internet import defer
 from twisted.python import log
 import json
 import urllib.parse
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 
 from .handlers import config_handler, health_handler
+from ..db.models import ApiResponse
+
+
+# Максимальное число закэшированных деревьев ресурсов сервисов
+SERVICE_RESOURCE_CACHE_SIZE = 1024
+
+# Заголовки, общие для всех ответов API, в формате Headers.setRawHeaders
+_STATIC_HEADERS = (
+    (b'Content-Type', (b'application/json; charset=utf-8',)),
+    (b'Access-Control-Allow-Origin', (b'*',)),
+    (b'Access-Control-Allow-Methods', (b'GET, POST, PUT, DELETE, OPTIONS',)),
+    (b'Access-Control-Allow-Headers', (b'Content-Type',)),
+)
+
+# Статические ответы не меняются - сериализуем их один раз при импорте
+_ROOT_JSON = ApiResponse(data={
+    'message': 'Configuration Management Service API',
+    'version': '1.0.0',
+    'endpoints': [
+        '/config/{service}',
+        '/health'
+    ]
+}).to_json()
+
+_API_INFO_JSON = ApiResponse(data={
+    'service': 'Configuration Management Service',
+    'endpoints': {
+        'POST /config/{service}': 'Create new configuration',
+        'GET /config/{service}': 'Get configuration (latest or specific version)',
+        'GET /config/{service}/history': 'Get configuration history'
+    },
+    'parameters': {
+        'version': 'Specific version number (optional)',
+        'template': 'Set to 1 to enable Jinja2 rendering (optional)'
+    }
+}).to_json()
 
 
 class BaseResource(Resource):
@@ -22,49 +59,45 @@ class BaseResource(Resource):
     def _get_request_body(self, request) -> str:
         """Получает тело запроса как строку."""
         try:
-            body = request.content.read()
-            if isinstance(body, bytes):
-                body = body.decode('utf-8')
-            return body
-        except Exception as e:
+            content = request.content
+            # Небольшие тела Twisted держит в BytesIO - забираем буфер целиком,
+            # большие пишутся во временный файл и читаются обычным read()
+            body = content.getvalue() if hasattr(content, 'getvalue') else content.read()
+            return body.decode('utf-8')
+        except (OSError, UnicodeDecodeError) as e:
             log.err(f"Error reading request body: {e}")
             return ""
     
     def _parse_query_params(self, request) -> Dict[str, Any]:
         """Парсит параметры запроса."""
-        params = {}
-        
-        for key, values in request.args.items():
-            if isinstance(key, bytes):
-                key = key.decode('utf-8')
-            
-            if len(values) == 1:
-                value = values[0]
-                if isinstance(value, bytes):
-                    value = value.decode('utf-8')
-                params[key] = value
-            else:
-                # Множественные значения
-                decoded_values = []
-                for v in values:
-                    if isinstance(v, bytes):
-                        v = v.decode('utf-8')
-                    decoded_values.append(v)
-                params[key] = decoded_values
-        
-        return params
+        # Twisted всегда отдает ключи и значения request.args как bytes
+        return {
+            key.decode('utf-8'): (
+                values[0].decode('utf-8') if len(values) == 1
+                else [v.decode('utf-8') for v in values]  # множественные значения
+            )
+            for key, values in request.args.items()
+        }
     
     def _send_response(self, request, response):
         """Отправляет ответ клиенту."""
         try:
-            request.setResponseCode(response.status_code)
-            request.setHeader(b'Content-Type', b'application/json; charset=utf-8')
-            request.setHeader(b'Access-Control-Allow-Origin', b'*')
-            request.setHeader(b'Access-Control-Allow-Methods', b'GET, POST, PUT, DELETE, OPTIONS')
-            request.setHeader(b'Access-Control-Allow-Headers', b'Content-Type')
+            body = response.to_json()
+        except (TypeError, ValueError) as e:
+            log.err(f"Error serializing response: {e}")
+            request.setResponseCode(500)
+            request.finish()
+            return
+        
+        self._send_precomputed(request, body, response.status_code)
+    
+    def _send_precomputed(self, request, body: bytes, status_code: int = 200):
+        """Отправляет клиенту уже сериализованное JSON тело."""
+        try:
+            request.setResponseCode(status_code)
+            self._set_static_headers(request)
             
-            response_json = response.to_json()
-            request.write(response_json.encode('utf-8'))
+            request.write(body)
             request.finish()
             
         except Exception as e:
@@ -72,9 +105,26 @@ class BaseResource(Resource):
             request.setResponseCode(500)
             request.finish()
     
+    @staticmethod
+    def _set_static_headers(request):
+        """Выставляет общие заголовки напрямую в request.responseHeaders."""
+        set_raw_headers = request.responseHeaders.setRawHeaders
+        for name, values in _STATIC_HEADERS:
+            set_raw_headers(name, values)
+    
+    def render_OPTIONS(self, request):
+        """Отвечает на CORS preflight без вызова обработчиков."""
+        request.setResponseCode(204)
+        self._set_static_headers(request)
+        return b''
+    
+    def _handle_failure(self, failure, request):
+        """Логирует непредвиденную ошибку обработчика и отвечает 500."""
+        log.err(failure, "Unhandled error while processing request")
+        self._handle_error(request, f"Internal server error: {failure.value}")
+    
     def _handle_error(self, request, error_msg: str, status_code: int = 500):
         """Обрабатывает ошибки."""
-        from ..db.models import ApiResponse
         response = ApiResponse(error=error_msg, status_code=status_code)
         self._send_response(request, response)
 
@@ -116,7 +166,7 @@ class ConfigResource(BaseResource):
             template_params=template_params
         )
         d.addCallback(lambda response: self._send_response(request, response))
-        d.addErrback(lambda failure: self._handle_error(request, str(failure.value)))
+        d.addErrback(self._handle_failure, request)
         
         return NOT_DONE_YET
     
@@ -131,7 +181,7 @@ class ConfigResource(BaseResource):
         # Асинхронно создаем конфигурацию
         d = config_handler.create_configuration(self.service_name, yaml_content)
         d.addCallback(lambda response: self._send_response(request, response))
-        d.addErrback(lambda failure: self._handle_error(request, str(failure.value)))
+        d.addErrback(self._handle_failure, request)
         
         return NOT_DONE_YET
 
@@ -148,7 +198,7 @@ class ConfigHistoryResource(BaseResource):
         """Получение истории версий."""
         d = config_handler.get_configuration_history(self.service_name)
         d.addCallback(lambda response: self._send_response(request, response))
-        d.addErrback(lambda failure: self._handle_error(request, str(failure.value)))
+        d.addErrback(self._handle_failure, request)
         
         return NOT_DONE_YET
 
@@ -160,51 +210,45 @@ class ServiceResource(BaseResource):
         super().__init__()
         self.service_name = service_name
         
-        # Добавляем дочерние ресурсы
+        # Добавляем дочерние ресурсы. Они не хранят состояние запроса,
+        # поэтому один экземпляр обслуживает все запросы к сервису
+        self.putChild(b'', ConfigResource(service_name))  # /config/{service}/
         self.putChild(b'history', ConfigHistoryResource(service_name))
     
     def getChild(self, name, request):
-        """Обрабатывает дочерние пути."""
-        if name == b'':
-            # Если путь заканчивается на /config/{service}
-            return ConfigResource(self.service_name)
-        elif name == b'history':
-            return ConfigHistoryResource(self.service_name)
-        else:
-            return BaseResource()  # 404
+        """Обрабатывает неизвестные дочерние пути."""
+        return BaseResource()  # 404
 
 
 class ConfigRootResource(BaseResource):
     """Корневой ресурс для /config."""
     
+    def __init__(self):
+        super().__init__()
+        # LRU-кэш деревьев ресурсов по имени сервиса
+        self._service_cache: 'OrderedDict[bytes, ServiceResource]' = OrderedDict()
+    
     def getChild(self, name, request):
-        """Динамически создает ресурсы для сервисов."""
+        """Возвращает (и кэширует) ресурсы для сервисов."""
         if name == b'':
             return self
         
-        # Декодируем имя сервиса
-        service_name = name.decode('utf-8') if isinstance(name, bytes) else name
-        return ServiceResource(service_name)
+        resource = self._service_cache.get(name)
+        if resource is None:
+            # Декодируем имя сервиса
+            service_name = name.decode('utf-8') if isinstance(name, bytes) else name
+            resource = ServiceResource(service_name)
+            self._service_cache[name] = resource
+            if len(self._service_cache) > SERVICE_RESOURCE_CACHE_SIZE:
+                self._service_cache.popitem(last=False)
+        else:
+            self._service_cache.move_to_end(name)
+        
+        return resource
     
     def render_GET(self, request):
         """Возвращает список доступных эндпоинтов."""
-        from ..db.models import ApiResponse
-        
-        api_info = {
-            'service': 'Configuration Management Service',
-            'endpoints': {
-                'POST /config/{service}': 'Create new configuration',
-                'GET /config/{service}': 'Get configuration (latest or specific version)',
-                'GET /config/{service}/history': 'Get configuration history'
-            },
-            'parameters': {
-                'version': 'Specific version number (optional)',
-                'template': 'Set to 1 to enable Jinja2 rendering (optional)'
-            }
-        }
-        
-        response = ApiResponse(data=api_info)
-        self._send_response(request, response)
+        self._send_precomputed(request, _API_INFO_JSON)
         return NOT_DONE_YET
 
 
@@ -219,7 +263,7 @@ class HealthResource(BaseResource):
         """Health check."""
         d = health_handler.check_health()
         d.addCallback(lambda response: self._send_response(request, response))
-        d.addErrback(lambda failure: self._handle_error(request, str(failure.value)))
+        d.addErrback(self._handle_failure, request)
         
         return NOT_DONE_YET
 
@@ -236,17 +280,5 @@ class RootResource(BaseResource):
     
     def render_GET(self, request):
         """Главная страница API."""
-        from ..db.models import ApiResponse
-        
-        welcome_data = {
-            'message': 'Configuration Management Service API',
-            'version': '1.0.0',
-            'endpoints': [
-                '/config/{service}',
-                '/health'
-            ]
-        }
-        
-        response = ApiResponse(data=welcome_data)
-        self._send_response(request, response)
+        self._send_precomputed(request, _ROOT_JSON)
         return NOT_DONE_YET
@@ -8,12 +8,12 @@ from twisted.internet import reactor, endpoints
 from twisted.python import log
 from twisted.application import service, internet
 
-# Добавляем текущую директорию в PYTHONPATH
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# При запуске файла напрямую (python app.py, twistd -y app.py) пакет
+# не импортирован - добавляем корень проекта в PYTHONPATH
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config_service.api import RootResource
 from config_service.config import config
-from config_service.db import db_connection
 
 
 class ConfigServiceApplication:
@@ -22,7 +22,7 @@ class ConfigServiceApplication:
     def __init__(self):
         self.config = config
         self.site = None
-        self.db = db_connection
+        self.db = None  # создается в setup_database
     
     def setup_logging(self):
         """Настраивает логирование."""
@@ -34,6 +34,13 @@ class ConfigServiceApplication:
     
     def create_site(self):
         """Создает Twisted Web Site."""
+        # API импортируется лениво, чтобы импорт модуля оставался дешевым
+        from config_service.api import RootResource
+        from config_service.validation.validators import LIBYAML_AVAILABLE
+        
+        if not LIBYAML_AVAILABLE:
+            log.msg("PyYAML собран без libyaml: используется медленный Python парсер YAML")
+        
         root_resource = RootResource()
         self.site = server.Site(root_resource)
         
@@ -43,6 +50,11 @@ class ConfigServiceApplication:
         log.msg("Twisted Web Site создан")
         return self.site
     
+    def setup_threadpool(self):
+        """Настраивает пул потоков reactor'а для валидации YAML."""
+        reactor.suggestThreadPoolSize(self.config.THREAD_POOL_SIZE)
+        log.msg(f"Размер пула потоков: {self.config.THREAD_POOL_SIZE}")
+    
     def setup_database(self):
         """Настраивает подключение к базе данных."""
         try:
@@ -51,7 +63,9 @@ class ConfigServiceApplication:
             log.msg(f"Подключение к базе данных: {self.config.DB_HOST}:{self.config.DB_PORT}")
             log.msg(f"База данных: {self.config.DB_NAME}")
             
-            # db_connection уже создан при импорте
+            from config_service.db import get_db_connection
+            
+            self.db = get_db_connection()
             log.msg("Database connection готово")
             
         except Exception as e:
@@ -62,6 +76,7 @@ class ConfigServiceApplication:
         """Запускает сервер."""
         try:
             self.setup_logging()
+            self.setup_threadpool()
             self.setup_database()
             self.create_site()
             
@@ -115,6 +130,7 @@ def create_application():
     # Настраиваем сервис
     config_app = ConfigServiceApplication()
     config_app.setup_logging()
+    config_app.setup_threadpool()
     config_app.setup_database()
     site = config_app.create_site()
     
@@ -141,7 +157,6 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
-# Для twistd
-application = create_application()
+elif not __package__:
+    # Для twistd: файл исполняется напрямую, а не импортируется как модуль
+    application = create_application()
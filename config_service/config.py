@@ -20,6 +20,14 @@ class Config:
     APP_PORT: int = int(os.getenv('APP_PORT', '8080'))
     DEBUG: bool = os.getenv('DEBUG', 'false').lower() == 'true'
     
+    # Cache settings
+    CONFIG_CACHE_TTL: float = float(os.getenv('CONFIG_CACHE_TTL', '30'))  # TTL последней версии, сек
+    CONFIG_CACHE_SIZE: int = int(os.getenv('CONFIG_CACHE_SIZE', '4096'))
+    HEALTH_CACHE_TTL: float = float(os.getenv('HEALTH_CACHE_TTL', '1'))  # сек
+    
+    # Пул потоков reactor'а для CPU-bound работы (парсинг и валидация YAML)
+    THREAD_POOL_SIZE: int = int(os.getenv('THREAD_POOL_SIZE', str(os.cpu_count() or 4)))
+    
     @property
     def database_url(self) -> str:
         """Возвращает URL подключения к базе данных."""
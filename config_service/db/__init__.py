@@ -1,7 +1,21 @@
 """
 Database package for configuration service.
 """
-from .connection import db_connection
+from .connection import get_db_connection, DATABASE_ERRORS
 from .models import ConfigurationModel, ConfigHistoryItem, ApiResponse
 
-__all__ = ['db_connection', 'ConfigurationModel', 'ConfigHistoryItem', 'ApiResponse']
+__all__ = [
+    'db_connection',
+    'get_db_connection',
+    'DATABASE_ERRORS',
+    'ConfigurationModel',
+    'ConfigHistoryItem',
+    'ApiResponse'
+]
+
+
+def __getattr__(name: str):
+    # db_connection создается лениво при первом обращении (PEP 562)
+    if name == 'db_connection':
+        return get_db_connection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,89 @@
 """
 Модуль для асинхронной работы с PostgreSQL через adbapi.
 """
+import psycopg2
+from psycopg2.extras import Json
 from twisted.enterprise import adbapi
 from twisted.internet import defer
+from twisted.logger import Logger
 from twisted.python import log
-from typing import List, Optional, Dict, Any
-import json
+from typing import Optional, Dict, Any, Tuple
+from collections import OrderedDict
+import time
 
-from .models import ConfigurationModel, ConfigHistoryItem
+from .models import ConfigurationModel
 from ..config import config
+from ..serialization import dumps
+
+_log = Logger()
+
+
+# Число попыток автоназначения версии при конкурентной записи
+SAVE_RETRIES = 3
+
+# Ошибки работы с БД, которые обработчики превращают в ответ 500
+DATABASE_ERRORS = (psycopg2.Error, adbapi.ConnectionLost)
+
+# Ключ кэша чтения: (service, version, raw)
+CacheKey = Tuple[str, Optional[int], bool]
+
+
+# Горячие запросы готовятся один раз на каждом физическом соединении,
+# чтобы Postgres не разбирал и не планировал их при каждом вызове
+PREPARED_STATEMENTS = (
+    """PREPARE get_latest(text) AS
+       SELECT id, service, version, payload, created_at
+       FROM configurations
+       WHERE service = $1
+       ORDER BY version DESC LIMIT 1""",
+    """PREPARE get_version(text, integer) AS
+       SELECT id, service, version, payload, created_at
+       FROM configurations
+       WHERE service = $1 AND version = $2""",
+    """PREPARE get_latest_raw(text) AS
+       SELECT payload::text
+       FROM configurations
+       WHERE service = $1
+       ORDER BY version DESC LIMIT 1""",
+    """PREPARE get_version_raw(text, integer) AS
+       SELECT payload::text
+       FROM configurations
+       WHERE service = $1 AND version = $2""",
+    """PREPARE save_cfg(text, integer, jsonb) AS
+       INSERT INTO configurations (service, version, payload)
+       VALUES ($1, $2, $3) RETURNING id, version, created_at""",
+    """PREPARE save_cfg_next(text, jsonb) AS
+       INSERT INTO configurations (service, version, payload)
+       SELECT $1, next.version, $2 || jsonb_build_object('version', next.version)
+       FROM (SELECT COALESCE(MAX(version), 0) + 1 AS version
+             FROM configurations WHERE service = $1) AS next
+       ON CONFLICT (service, version) DO NOTHING
+       RETURNING id, version, created_at""",
+    """PREPARE get_history_json(text) AS
+       SELECT COALESCE(
+           json_agg(json_build_object('version', version, 'created_at', created_at)
+                    ORDER BY version DESC),
+           '[]'::json
+       )::text
+       FROM configurations
+       WHERE service = $1""",
+)
+
+
+def _prepare_statements(conn):
+    """Подготавливает PREPARED_STATEMENTS на новом соединении (cp_openfun)."""
+    cursor = conn.cursor()
+    try:
+        for statement in PREPARED_STATEMENTS:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+    conn.commit()
+
+
+def _dumps_payload(payload: Dict[str, Any]) -> str:
+    """Сериализует payload для psycopg2 Json адаптера через orjson."""
+    return dumps(payload).decode('utf-8')
 
 
 class DatabaseConnection:
@@ -16,6 +91,12 @@ class DatabaseConnection:
     
     def __init__(self):
         self.dbpool = None
+        # (service, version, raw) -> (время записи, модель или JSON payload);
+        # version=None - последняя версия
+        self._read_cache: 'OrderedDict[CacheKey, Tuple[float, Any]]' = OrderedDict()
+        # service -> поколение; растет при каждом сохранении, чтобы чтение,
+        # начатое до записи, не положило в кэш устаревшую версию
+        self._generations: Dict[str, int] = {}
         self._setup_connection()
     
     def _setup_connection(self):
@@ -32,7 +113,8 @@ class DatabaseConnection:
                 cp_min=1,  # минимум соединений
                 cp_max=10,  # максимум соединений
                 cp_reconnect=True,  # автоматическое переподключение
-                cp_good_sql="SELECT 1"  # SQL для проверки соединения
+                cp_good_sql="SELECT 1",  # SQL для проверки соединения
+                cp_openfun=_prepare_statements  # вызывается для каждого нового соединения
             )
             log.msg("Database connection pool создан")
             
@@ -40,6 +122,46 @@ class DatabaseConnection:
             log.err(f"Ошибка при подключении к базе: {e}")
             raise
     
+    def _get_cached(self, key: CacheKey) -> Any:
+        """Возвращает конфигурацию из кэша чтения или None."""
+        entry = self._read_cache.get(key)
+        if entry is None:
+            return None
+        
+        stored_at, value = entry
+        # Конкретные версии неизменяемы, а последняя актуальна только в пределах TTL
+        if key[1] is None and time.monotonic() - stored_at > config.CONFIG_CACHE_TTL:
+            del self._read_cache[key]
+            return None
+        
+        self._read_cache.move_to_end(key)
+        return value
+    
+    def _put_cached(self, key: CacheKey, value: Any, generation: int):
+        """
+        Кладет конфигурацию в кэш чтения, вытесняя самую старую запись.
+        
+        Результат не кэшируется, если за время запроса сервис был
+        сохранен (поколение изменилось).
+        """
+        if self._generations.get(key[0], 0) != generation:
+            return
+        
+        self._read_cache[key] = (time.monotonic(), value)
+        self._read_cache.move_to_end(key)
+        if len(self._read_cache) > config.CONFIG_CACHE_SIZE:
+            self._read_cache.popitem(last=False)
+    
+    def get_cached_configuration(self, service: str, version: Optional[int] = None,
+                                 raw: bool = False) -> Any:
+        """
+        Синхронно возвращает конфигурацию из кэша чтения без обращения к БД.
+        
+        Returns:
+            ConfigurationModel (или JSON payload при raw=True) либо None
+        """
+        return self._get_cached((service, version, raw))
+    
     @defer.inlineCallbacks
     def save_configuration(self, service: str, payload: Dict[str, Any]) -> ConfigurationModel:
         """
@@ -49,36 +171,52 @@ class DatabaseConnection:
         try:
             # Извлекаем версию из payload или назначаем автоматически
             version = payload.get('version')
+            # Адаптер сериализует dict прямо при подстановке параметра
+            payload_param = Json(payload, dumps=_dumps_payload)
             
             if version is None:
-                # Получаем максимальную версию для данного сервиса
-                max_version = yield self.dbpool.runQuery(
-                    "SELECT COALESCE(MAX(version), 0) FROM configurations WHERE service = %s",
-                    (service,)
+                # Следующая версия вычисляется в том же INSERT - один round trip.
+                # При гонке с параллельной записью ON CONFLICT не вернет строку,
+                # и мы повторяем попытку с новым MAX(version)
+                for _ in range(SAVE_RETRIES):
+                    result = yield self.dbpool.runQuery(
+                        "EXECUTE save_cfg_next(%s, %s)",
+                        (service, payload_param)
+                    )
+                    if result:
+                        break
+                else:
+                    raise RuntimeError(
+                        f"Не удалось назначить версию для {service} "
+                        f"за {SAVE_RETRIES} попыток"
+                    )
+            else:
+                # Сохраняем конфигурацию с явно указанной версией
+                result = yield self.dbpool.runQuery(
+                    "EXECUTE save_cfg(%s, %s, %s)",
+                    (service, version, payload_param)
                 )
-                version = max_version[0][0] + 1
-                payload['version'] = version
-            
-            # Сохраняем конфигурацию
-            result = yield self.dbpool.runQuery(
-                """INSERT INTO configurations (service, version, payload) 
-                   VALUES (%s, %s, %s) RETURNING id, created_at""",
-                (service, version, json.dumps(payload))
-            )
             
             row = result[0]
+            version = row[1]
             config_model = ConfigurationModel(
                 id=row[0],
                 service=service,
                 version=version,
-                payload=payload,
-                created_at=row[1]
+                payload={**payload, 'version': version},
+                created_at=row[2]
             )
             
-            log.msg(f"Сохранена конфигурация для {service}, version {version}")
+            # Последняя версия сервиса изменилась
+            self._generations[service] = self._generations.get(service, 0) + 1
+            self._read_cache.pop((service, None, False), None)
+            self._read_cache.pop((service, None, True), None)
+            
+            _log.info("Сохранена конфигурация для {service}, version {version}",
+                      service=service, version=version)
             defer.returnValue(config_model)
             
-        except Exception as e:
+        except DATABASE_ERRORS as e:
             log.err(f"Ошибка при сохранении конфигурации: {e}")
             raise
     
@@ -89,21 +227,22 @@ class DatabaseConnection:
         Если версия не указана, возвращает последнюю.
         """
         try:
+            cache_key = (service, version, False)
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                defer.returnValue(cached)
+            generation = self._generations.get(service, 0)
+            
             if version is None:
                 # Получаем последнюю версию
                 result = yield self.dbpool.runQuery(
-                    """SELECT id, service, version, payload, created_at 
-                       FROM configurations 
-                       WHERE service = %s 
-                       ORDER BY version DESC LIMIT 1""",
+                    "EXECUTE get_latest(%s)",
                     (service,)
                 )
             else:
                 # Получаем конкретную версию
                 result = yield self.dbpool.runQuery(
-                    """SELECT id, service, version, payload, created_at 
-                       FROM configurations 
-                       WHERE service = %s AND version = %s""",
+                    "EXECUTE get_version(%s, %s)",
                     (service, version)
                 )
             
@@ -111,39 +250,76 @@ class DatabaseConnection:
                 defer.returnValue(None)
             
             row = result[0]
-            # Преобразуем JSON строку обратно в dict если нужно
-            payload = row[3] if isinstance(row[3], dict) else json.loads(row[3])
-            
             config_model = ConfigurationModel(
                 id=row[0],
                 service=row[1],
                 version=row[2], 
-                payload=payload,
+                payload=row[3],  # psycopg2 сам декодирует JSONB в dict
                 created_at=row[4]
             )
             
+            self._put_cached(cache_key, config_model, generation)
             defer.returnValue(config_model)
             
-        except Exception as e:
+        except DATABASE_ERRORS as e:
             log.err(f"Ошибка при получении конфигурации: {e}")
             raise
     
     @defer.inlineCallbacks
-    def get_configuration_history(self, service: str) -> List[ConfigHistoryItem]:
-        """Получает историю версий для сервиса."""
+    def get_configuration_raw(self, service: str, version: Optional[int] = None) -> Optional[bytes]:
+        """
+        Получает payload конфигурации сервиса готовым JSON.
+        
+        Postgres отдает JSONB как текст, поэтому payload не декодируется
+        в dict и не сериализуется обратно. Если версия не указана,
+        возвращает последнюю.
+        """
+        try:
+            cache_key = (service, version, True)
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                defer.returnValue(cached)
+            generation = self._generations.get(service, 0)
+            
+            if version is None:
+                result = yield self.dbpool.runQuery(
+                    "EXECUTE get_latest_raw(%s)",
+                    (service,)
+                )
+            else:
+                result = yield self.dbpool.runQuery(
+                    "EXECUTE get_version_raw(%s, %s)",
+                    (service, version)
+                )
+            
+            if not result:
+                defer.returnValue(None)
+            
+            payload_json = result[0][0].encode('utf-8')
+            self._put_cached(cache_key, payload_json, generation)
+            defer.returnValue(payload_json)
+            
+        except DATABASE_ERRORS as e:
+            log.err(f"Ошибка при получении конфигурации: {e}")
+            raise
+    
+    @defer.inlineCallbacks
+    def get_configuration_history_json(self, service: str) -> str:
+        """
+        Получает историю версий для сервиса готовым JSON массивом.
+        
+        Агрегация выполняется в Postgres, поэтому строки не превращаются
+        в Python объекты. Для неизвестного сервиса возвращается '[]'.
+        """
         try:
             result = yield self.dbpool.runQuery(
-                """SELECT version, created_at 
-                   FROM configurations 
-                   WHERE service = %s 
-                   ORDER BY version DESC""",
+                "EXECUTE get_history_json(%s)",
                 (service,)
             )
             
-            history = [ConfigHistoryItem.from_db_row(row) for row in result]
-            defer.returnValue(history)
+            defer.returnValue(result[0][0])
             
-        except Exception as e:
+        except DATABASE_ERRORS as e:
             log.err(f"Ошибка при получении истории: {e}")
             raise
     
@@ -154,5 +330,21 @@ class DatabaseConnection:
             log.msg("Database connection pool закрыт")
 
 
-# Глобальный экземпляр подключения к БД
-db_connection = DatabaseConnection()
+# Глобальный экземпляр подключения к БД создается при первом обращении,
+# чтобы импорт модуля не поднимал пул соединений
+_db_connection: Optional[DatabaseConnection] = None
+
+
+def get_db_connection() -> DatabaseConnection:
+    """Возвращает глобальное подключение к БД, создавая его при первом вызове."""
+    global _db_connection
+    if _db_connection is None:
+        _db_connection = DatabaseConnection()
+    return _db_connection
+
+
+def __getattr__(name: str):
+    # PEP 562: db_connection остается доступным как атрибут модуля
+    if name == 'db_connection':
+        return get_db_connection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,25 @@
 """
 Модели данных для работы с базой.
 """
+from dataclasses import dataclass
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-import json
+
+from ..serialization import dumps
+
+
+def _isoformat(value) -> Optional[str]:
+    """Возвращает дату в ISO формате (строки и None - как есть)."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
 
 
 class ConfigurationModel:
     """Модель конфигурации сервиса."""
     
+    __slots__ = ('id', 'service', 'version', 'payload', 'created_at')
+    
     def __init__(self, service: str, version: int, payload: Dict[str, Any], 
                  created_at: Optional[datetime] = None, id: Optional[int] = None):
         self.id = id
@@ -24,7 +35,7 @@ class ConfigurationModel:
             'service': self.service,
             'version': self.version,
             'payload': self.payload,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': _isoformat(self.created_at)
         }
     
     @classmethod
@@ -42,6 +53,8 @@ class ConfigurationModel:
 class ConfigHistoryItem:
     """Элемент истории конфигураций."""
     
+    __slots__ = ('version', 'created_at')
+    
     def __init__(self, version: int, created_at: datetime):
         self.version = version
         self.created_at = created_at
@@ -50,7 +63,7 @@ class ConfigHistoryItem:
         """Преобразует в словарь."""
         return {
             'version': self.version,
-            'created_at': self.created_at.isoformat()
+            'created_at': _isoformat(self.created_at)
         }
     
     @classmethod  
@@ -62,20 +75,35 @@ class ConfigHistoryItem:
         )
 
 
+def _default(obj: Any) -> Any:
+    """Hook сериализации для значений, которых нет в JSON."""
+    if isinstance(obj, datetime):  # сюда попадаем только без orjson
+        return obj.isoformat()
+    return str(obj)
+
+
+@dataclass(slots=True)
 class ApiResponse:
     """Стандартный ответ API."""
     
-    def __init__(self, data: Any = None, error: Optional[str] = None, 
-                 status_code: int = 200):
-        self.data = data
-        self.error = error
-        self.status_code = status_code
+    data: Any = None
+    error: Optional[str] = None
+    status_code: int = 200
+    raw_json: Optional[bytes] = None  # уже сериализованные data, если есть
     
-    def to_json(self) -> str:
-        """Преобразует в JSON строку."""
+    @classmethod
+    def ok(cls, data: Any) -> 'ApiResponse':
+        """Успешный ответ 200 с данными."""
+        return cls(data)
+    
+    def to_json(self) -> bytes:
+        """Преобразует в JSON (UTF-8 bytes)."""
+        if self.raw_json is not None and not self.error:
+            return self.raw_json
+        
         if self.error:
             response_data = {'error': self.error}
         else:
             response_data = self.data
         
-        return json.dumps(response_data, ensure_ascii=False, indent=2)
+        return dumps(response_data, indent=True, default=_default)
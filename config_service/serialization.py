@@ -0,0 +1,54 @@
+"""
+JSON сериализация через orjson с fallback на стандартный json.
+"""
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен - работаем на stdlib
+    orjson = None
+
+
+# orjson.JSONDecodeError наследуется от json.JSONDecodeError,
+# поэтому одного типа достаточно для обеих реализаций
+JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(obj: Any, indent: bool = False,
+          default: Optional[Callable[[Any], Any]] = str) -> bytes:
+    """
+    Сериализует объект в JSON.
+
+    Args:
+        obj: Объект для сериализации
+        indent: Форматировать ли вывод с отступом в 2 пробела
+        default: Функция для несериализуемых объектов
+
+    Returns:
+        JSON в кодировке UTF-8
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # orjson не сериализует целые за пределами 64 бит (YAML их допускает),
+            # такие данные обрабатывает stdlib json
+            pass
+
+    return json.dumps(
+        obj, ensure_ascii=False, indent=2 if indent else None, default=default
+    ).encode('utf-8')
+
+
+def loads(data) -> Any:
+    """
+    Парсит JSON из str или bytes.
+
+    Всегда через stdlib json: orjson молча превращает целые шире 64 бит
+    во float и теряет точность.
+    """
+    return json.loads(data)
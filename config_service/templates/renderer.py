@@ -3,9 +3,53 @@
 """
 from jinja2 import Environment, BaseLoader, TemplateError, meta
 from typing import Dict, Any, Optional
-import json
+import functools
+import math
+import re
+from twisted.logger import Logger
 from twisted.python import log
 
+from ..config import config
+from ..serialization import dumps, loads, JSONDecodeError
+
+_log = Logger()
+
+
+# Максимальное число скомпилированных шаблонов в LRU-кэше рендерера
+TEMPLATE_CACHE_SIZE = 512
+
+# Простое выражение {{ name }} / {{ name.attr }}, имя корневой переменной - в группе
+_SIMPLE_VAR_FINDALL = re.compile(r'\{\{\s*([A-Za-z_]\w*)(?:\.\w+)*\s*\}\}').findall
+
+# Символы, которые в JSON строке нужно экранировать
+_JSON_ESCAPE_SEARCH = re.compile(r'["\\\x00-\x1f]').search
+
+# Литералы Jinja2, которые выглядят как имена, но переменными не являются
+_JINJA_CONSTANTS = frozenset(('true', 'false', 'none', 'True', 'False', 'None'))
+
+# Единый Jinja2 environment на весь процесс: создается один раз при импорте.
+# Шаблоны конфигураций приходят строками, поэтому перечитывать их
+# с диска (auto_reload) имеет смысл только в режиме отладки
+_JINJA_ENV = Environment(
+    loader=None,
+    autoescape=False,  # не экранируем HTML, работаем с конфигами
+    trim_blocks=True,  # убираем лишние переносы строк
+    lstrip_blocks=True,
+    keep_trailing_newline=True,
+    cache_size=-1,  # кэш шаблонов без ограничения размера
+    auto_reload=config.DEBUG,
+    optimized=True
+)
+
+# Скомпилированные шаблоны кэшируются по исходному тексту, чтобы
+# одинаковые строки не проходили lex/parse/compile заново
+_compile_template = functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(_JINJA_ENV.from_string)
+
+
+def _always_fresh() -> bool:
+    """uptodate-функция для шаблонов из строк: исходник не меняется."""
+    return True
+
 
 class ConfigTemplateLoader(BaseLoader):
     """
@@ -17,37 +61,42 @@ class ConfigTemplateLoader(BaseLoader):
     
     def get_source(self, environment, template):
         """Возвращает исходный код шаблона."""
-        return self.template_source, None, lambda: True
+        return self.template_source, None, _always_fresh
 
 
 class TemplateRenderer:
     """Класс для рендеринга конфигураций через Jinja2."""
     
     def __init__(self):
-        # Настраиваем Jinja2 environment
-        self.env = Environment(
-            loader=None,
-            autoescape=False,  # не экранируем HTML, работаем с конфигами
-            trim_blocks=True,  # убираем лишние переносы строк
-            lstrip_blocks=True,
-            keep_trailing_newline=True
-        )
-        
-        # Добавляем полезные фильтры
-        self.env.filters['to_json'] = self._to_json_filter
-        self.env.filters['from_json'] = self._from_json_filter
+        # Environment и кэш шаблонов общие для всех экземпляров
+        self.env = _JINJA_ENV
+        self._compile = _compile_template
     
     @staticmethod
     def _to_json_filter(value: Any) -> str:
         """Фильтр для преобразования в JSON."""
-        return json.dumps(value, ensure_ascii=False, indent=2)
+        # Скаляры встречаются в шаблонах чаще всего - сериализуем их без энкодера
+        value_type = type(value)
+        if value_type is str:
+            if not _JSON_ESCAPE_SEARCH(value):
+                return '"' + value + '"'
+        elif value_type is bool:
+            return 'true' if value else 'false'
+        elif value is None:
+            return 'null'
+        elif value_type is int:
+            return str(value)
+        elif value_type is float and math.isfinite(value):
+            return repr(value)
+        
+        return dumps(value, indent=True).decode('utf-8')
     
     @staticmethod  
     def _from_json_filter(value: str) -> Any:
         """Фильтр для парсинга JSON."""
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
+            return loads(value)
+        except (JSONDecodeError, TypeError):
             return value
     
     def render_config_template(self, config_data: Dict[str, Any], 
@@ -66,33 +115,48 @@ class TemplateRenderer:
             context = {}
         
         try:
-            # Преобразуем конфиг в JSON строку для рендеринга
-            config_json = json.dumps(config_data, ensure_ascii=False, indent=2)
-            
-            # Создаем шаблон из JSON
-            template = self.env.from_string(config_json)
-            
-            # Рендерим с контекстом
-            rendered_json = template.render(**context)
+            # Jinja2 вызывается только для строк с шаблонным синтаксисом,
+            # остальное дерево конфигурации возвращается без изменений
+            rendered_config = self._render_tree(config_data, context)
             
-            # Парсим обратно в Python объект
-            rendered_config = json.loads(rendered_json)
-            
-            log.msg(f"Шаблон отрендерен с контекстом: {list(context.keys())}")
+            _log.info("Шаблон отрендерен с контекстом: {variables}", variables=list(context))
             return rendered_config
             
         except TemplateError as e:
             log.err(f"Jinja2 template error: {e}")
             raise ValueError(f"Template rendering failed: {str(e)}")
-            
-        except json.JSONDecodeError as e:
-            log.err(f"JSON decode error after rendering: {e}")
-            raise ValueError(f"Invalid JSON after template rendering: {str(e)}")
         
         except Exception as e:
             log.err(f"Unexpected template rendering error: {e}")
             raise ValueError(f"Template rendering error: {str(e)}")
     
+    def _render_tree(self, node: Any, context: Dict[str, Any]) -> Any:
+        """
+        Рекурсивно рендерит строковые значения (и ключи) конфигурации.
+        
+        Args:
+            node: Узел конфигурации
+            context: Контекст для рендеринга
+            
+        Returns:
+            Узел с отрендеренными строками
+        """
+        if isinstance(node, str):
+            if _has_jinja(node):
+                return self._compile(node).render(**context)
+            return node
+        
+        if isinstance(node, dict):
+            return {
+                self._render_tree(key, context): self._render_tree(value, context)
+                for key, value in node.items()
+            }
+        
+        if isinstance(node, list):
+            return [self._render_tree(item, context) for item in node]
+        
+        return node
+    
     def render_string_template(self, template_string: str, 
                               context: Dict[str, Any]) -> str:
         """
@@ -106,7 +170,7 @@ class TemplateRenderer:
             Отрендеренная строка
         """
         try:
-            template = self.env.from_string(template_string)
+            template = self._compile(template_string)
             return template.render(**context)
         except TemplateError as e:
             log.err(f"String template error: {e}")
@@ -123,9 +187,17 @@ class TemplateRenderer:
             Множество имен переменных
         """
         try:
-            config_json = json.dumps(config_data, ensure_ascii=False)
-            ast = self.env.parse(config_json)
-            variables = meta.find_undeclared_variables(ast)
+            variables = set()
+            for template_string in _iter_template_strings(config_data):
+                names = _SIMPLE_VAR_FINDALL(template_string)
+                
+                # Если в строке есть блоки или сложные выражения - парсим ее Jinja2
+                if '{%' in template_string or len(names) != template_string.count('{{'):
+                    ast = self.env.parse(template_string)
+                    variables.update(meta.find_undeclared_variables(ast))
+                else:
+                    variables.update(name for name in names if name not in _JINJA_CONSTANTS)
+            
             return variables
         except Exception as e:
             log.err(f"Error extracting template variables: {e}")
@@ -148,6 +220,47 @@ class TemplateRenderer:
             return False, str(e)
 
 
+# Полезные фильтры регистрируются один раз при импорте
+_JINJA_ENV.filters['to_json'] = TemplateRenderer._to_json_filter
+_JINJA_ENV.filters['from_json'] = TemplateRenderer._from_json_filter
+
+
+def _has_jinja(value: str) -> bool:
+    """
+    Проверяет наличие '{{' или '{%' за один проход по строке.
+    
+    str.find прыгает сразу к следующей фигурной скобке, поэтому строки
+    без шаблонов просматриваются на скорости memchr.
+    """
+    index = value.find('{')
+    while index != -1:
+        if value.startswith(('{{', '{%'), index):
+            return True
+        index = value.find('{', index + 1)
+    return False
+
+
+def _iter_template_strings(node: Any):
+    """Рекурсивно перебирает ключи и строки конфигурации с шаблонным синтаксисом."""
+    if isinstance(node, str):
+        if _has_jinja(node):
+            yield node
+    
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            yield from _iter_template_strings(key)
+            yield from _iter_template_strings(value)
+    
+    elif isinstance(node, list):
+        for item in node:
+            yield from _iter_template_strings(item)
+
+
+def _contains_template(node: Any) -> bool:
+    """Проверяет наличие шаблонного синтаксиса, останавливаясь на первом совпадении."""
+    return next(_iter_template_strings(node), None) is not None
+
+
 class ConfigTemplateProcessor:
     """Процессор для работы с шаблонами конфигураций."""
     
@@ -166,29 +279,17 @@ class ConfigTemplateProcessor:
         Returns:
             Обработанная конфигурация
         """
-        if template_params is None:
-            template_params = {}
-        
-        # Добавляем некоторые полезные переменные по умолчанию
-        default_context = {
-            'user': template_params.get('user', 'anonymous'),
-            'env': template_params.get('env', 'development'),
-            'timestamp': template_params.get('timestamp', ''),
-        }
-        
-        # Объединяем с пользовательскими параметрами
-        context = {**default_context, **template_params}
+        # Копируем параметры и добавляем полезные переменные по умолчанию
+        context = dict(template_params) if template_params else {}
+        context.setdefault('user', 'anonymous')
+        context.setdefault('env', 'development')
+        context.setdefault('timestamp', '')
         
         return self.renderer.render_config_template(config_data, context)
     
     def has_template_syntax(self, config_data: Dict[str, Any]) -> bool:
         """Проверяет содержит ли конфигурация синтаксис шаблонов."""
-        try:
-            config_str = json.dumps(config_data, ensure_ascii=False)
-            # Простая проверка на наличие Jinja2 синтаксиса
-            return '{{' in config_str or '{%' in config_str
-        except Exception:
-            return False
+        return _contains_template(config_data)
 
 
 # Глобальный экземпляр процессора шаблонов
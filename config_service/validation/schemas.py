@@ -1,18 +1,45 @@
 """
 Схемы валидации для конфигураций.
 """
-from schema import Schema, And, Or, Optional, SchemaError
+from schema import Schema, Or, Optional, SchemaError
 from typing import Dict, Any
+from collections import OrderedDict
+import hashlib
+import threading
+
+from ..serialization import orjson
+
+
+# Максимальное число результатов проверки схемы в LRU-кэше
+SCHEMA_CACHE_SIZE = 1024
+
+
+# Предикаты проверяют тип и значение за один вызов, без вложенных And.
+# bool - подкласс int, поэтому тип сравнивается строго
+
+def _positive_int(value) -> bool:
+    """Версия должна быть положительным числом."""
+    return type(value) is int and value > 0
+
+
+def _valid_port(value) -> bool:
+    """Порт - целое число в диапазоне 1..65535."""
+    return type(value) is int and 1 <= value <= 65535
+
+
+def _nonempty_str(value) -> bool:
+    """Непустая строка."""
+    return type(value) is str and value != ''
 
 
 # Базовая схема для всех конфигураций
 BASE_CONFIG_SCHEMA = Schema({
-    'version': And(int, lambda v: v > 0),  # версия должна быть положительным числом
+    'version': _positive_int,
     
     # Database секция обязательна
     Optional('database'): {
-        'host': And(str, len),
-        'port': And(int, lambda p: 1 <= p <= 65535)
+        'host': Schema(_nonempty_str, error="database.host must be a non-empty string"),
+        'port': Schema(_valid_port, error="database.port must be an integer between 1 and 65535")
     },
     
     # Features секция опциональна  
@@ -46,14 +73,12 @@ def validate_config_schema(config_data: Dict[str, Any]) -> bool:
     Raises:
         SchemaError: Если конфигурация не соответствует схеме
     """
+    # Полная схема включает проверку обязательных полей, поэтому
+    # конфигурация проходит ровно одну схему за один обход
+    schema = BASE_CONFIG_SCHEMA if 'database' in config_data else REQUIRED_FIELDS_SCHEMA
+    
     try:
-        # Сначала проверяем обязательные поля
-        REQUIRED_FIELDS_SCHEMA.validate(config_data)
-        
-        # Потом проверяем полную схему если есть database секция
-        if 'database' in config_data:
-            BASE_CONFIG_SCHEMA.validate(config_data)
-        
+        schema.validate(config_data)
         return True
         
     except SchemaError as e:
@@ -61,37 +86,73 @@ def validate_config_schema(config_data: Dict[str, Any]) -> bool:
         raise SchemaError(f"Validation error: {str(e)}")
 
 
+# blake2b(канонический JSON конфигурации) -> ошибки валидации.
+# Валидация выполняется в пуле потоков, поэтому доступ под блокировкой
+_schema_cache: 'OrderedDict[bytes, tuple]' = OrderedDict()
+_schema_cache_lock = threading.Lock()
+
+
+def _schema_cache_key(config_data: Dict[str, Any]):
+    """
+    Вычисляет ключ кэша по каноническому (с сортировкой ключей) JSON.
+    
+    Returns:
+        Хэш или None, если конфигурацию нельзя сериализовать однозначно
+        (даты, бинарные данные, не строковые ключи, null/NaN/inf) - такие
+        не кэшируем
+    """
+    if orjson is None:
+        return None
+    
+    try:
+        canonical = orjson.dumps(
+            config_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+    except TypeError:
+        return None
+    
+    # orjson пишет None, NaN и ±inf одинаково как null, а схема их различает
+    if b'null' in canonical:
+        return None
+    
+    return hashlib.blake2b(canonical, digest_size=16).digest()
+
+
 def get_validation_errors(config_data: Dict[str, Any]) -> list:
     """
     Возвращает список ошибок валидации вместо исключения.
     
+    Результат кэшируется по содержимому конфигурации: повторные
+    отправки того же payload не проходят схему заново.
+    
     Args:
         config_data: Данные для проверки
         
     Returns:
         Список строк с описанием ошибок, пустой если все ок
     """
-    errors = []
+    key = _schema_cache_key(config_data)
+    if key is not None:
+        with _schema_cache_lock:
+            cached = _schema_cache.get(key)
+            if cached is not None:
+                _schema_cache.move_to_end(key)
+                return list(cached)
     
+    # Проверки host/port уже входят в BASE_CONFIG_SCHEMA
     try:
         validate_config_schema(config_data)
+        errors = ()
     except SchemaError as e:
-        errors.append(str(e))
+        errors = (str(e),)
     
-    # Дополнительные проверки
-    if 'database' in config_data:
-        db_config = config_data['database']
-        
-        # Проверяем host
-        if not db_config.get('host') or not isinstance(db_config.get('host'), str):
-            errors.append("database.host must be a non-empty string")
-            
-        # Проверяем port
-        port = db_config.get('port')
-        if not isinstance(port, int) or not (1 <= port <= 65535):
-            errors.append("database.port must be an integer between 1 and 65535")
-    
-    return errors
+    if key is not None:
+        with _schema_cache_lock:
+            _schema_cache[key] = errors
+            if len(_schema_cache) > SCHEMA_CACHE_SIZE:
+                _schema_cache.popitem(last=False)
+    
+    return list(errors)
 
 
 class ConfigValidator:
@@ -1,14 +1,32 @@
 """
 Валидаторы для YAML конфигураций.
 """
+import re
 import yaml
 from yaml.scanner import ScannerError
 from yaml.parser import ParserError
 from typing import Dict, Any, Tuple, Optional
-from twisted.python import log
+from twisted.internet import defer, threads
+from twisted.logger import Logger
 
 from .schemas import validator
 
+# twisted.logger форматирует сообщение только в наблюдателе, поэтому
+# отброшенные события не превращают исключения и списки в строки
+_log = Logger()
+
+# LibYAML C-биндинги в разы быстрее чистого Python loader'а
+try:
+    from yaml import CSafeLoader as SafeLoader
+    LIBYAML_AVAILABLE = True
+except ImportError:  # PyYAML собран без libyaml
+    from yaml import SafeLoader
+    LIBYAML_AVAILABLE = False
+
+# Любой YAML mapping содержит ':' (блочный ключ), '{' (flow mapping)
+# или '?' (сложный ключ). Без них парсить документ бессмысленно
+_MAPPING_SNIFF = re.compile(r'[:{?]').search
+
 
 class YAMLValidator:
     """Валидатор YAML конфигураций."""
@@ -27,9 +45,13 @@ class YAMLValidator:
         if not yaml_content or not yaml_content.strip():
             return False, None, "Empty YAML content"
         
+        # Дешевая проверка регулярным выражением до запуска парсера
+        if not _MAPPING_SNIFF(yaml_content):
+            return False, None, "YAML must represent a dictionary/object"
+        
         try:
             # Парсим YAML с безопасным loader'ом
-            data = yaml.safe_load(yaml_content)
+            data = yaml.load(yaml_content, Loader=SafeLoader)
             
             # Проверяем что получился словарь
             if not isinstance(data, dict):
@@ -38,15 +60,15 @@ class YAMLValidator:
             return True, data, None
             
         except ScannerError as e:
-            log.msg(f"YAML Scanner Error: {e}")
+            _log.info("YAML Scanner Error: {error}", error=e)
             return False, None, f"YAML syntax error: {str(e)}"
             
         except ParserError as e:
-            log.msg(f"YAML Parser Error: {e}")  
+            _log.info("YAML Parser Error: {error}", error=e)
             return False, None, f"YAML parsing error: {str(e)}"
             
         except Exception as e:
-            log.msg(f"Unexpected YAML error: {e}")
+            _log.info("Unexpected YAML error: {error}", error=e)
             return False, None, f"YAML processing error: {str(e)}"
     
     @staticmethod
@@ -70,15 +92,39 @@ class YAMLValidator:
         is_valid, schema_errors = validator.validate(data)
         
         if not is_valid:
-            log.msg(f"Schema validation failed: {schema_errors}")
+            _log.info("Schema validation failed: {errors}", errors=schema_errors)
         
         return is_valid, data, schema_errors
     
     @staticmethod
     def quick_yaml_check(yaml_content: str) -> bool:
-        """Быстрая проверка - можно ли распарсить YAML."""
-        success, _, _ = YAMLValidator.parse_yaml(yaml_content)
-        return success
+        """
+        Быстрая проверка - можно ли распарсить YAML в словарь.
+        
+        Читает только поток событий парсера, не строя Python объекты.
+        """
+        if not yaml_content or not _MAPPING_SNIFF(yaml_content):
+            return False
+        
+        try:
+            events = yaml.parse(yaml_content, Loader=SafeLoader)
+            for event in events:
+                if isinstance(event, yaml.NodeEvent):
+                    # Корнем документа должен быть словарь
+                    if not isinstance(event, yaml.MappingStartEvent):
+                        return False
+                    break
+            else:
+                return False
+            
+            # Дочитываем документ; после него допустим только конец потока
+            for event in events:
+                if isinstance(event, yaml.DocumentEndEvent):
+                    return isinstance(next(events), yaml.StreamEndEvent)
+            return False
+            
+        except yaml.YAMLError:
+            return False
 
 
 class ConfigurationValidator:
@@ -86,6 +132,8 @@ class ConfigurationValidator:
     
     def __init__(self):
         self.yaml_validator = YAMLValidator()
+        # Схемы собраны при импорте, поэтому используем общий экземпляр
+        self.validator = validator
     
     def validate_yaml_config(self, yaml_content: str) -> Tuple[bool, Optional[Dict[str, Any]], list]:
         """
@@ -96,6 +144,15 @@ class ConfigurationValidator:
         """
         return self.yaml_validator.validate_config(yaml_content)
     
+    def validate_yaml_config_async(self, yaml_content: str) -> defer.Deferred:
+        """
+        Валидирует YAML в пуле потоков, не блокируя reactor.
+        
+        Returns:
+            Deferred с (is_valid, parsed_config, errors)
+        """
+        return threads.deferToThread(self.validate_yaml_config, yaml_content)
+    
     def check_required_fields(self, config: Dict[str, Any]) -> list:
         """Проверяет обязательные поля."""
         errors = []
@@ -27,7 +27,24 @@ class TestConfigAPI(unittest.TestCase):
         # Проверяем что возвращается NOT_DONE_YET (асинхронный ответ)
         from twisted.web.server import NOT_DONE_YET
         self.assertEqual(result, NOT_DONE_YET)
-    
+
+        import json
+        body = json.loads(b''.join(request.written))
+        self.assertEqual(body['message'], 'Configuration Management Service API')
+
+    def test_options_preflight(self):
+        """Тест CORS preflight запроса."""
+        request = DummyRequest([b''])
+        request.method = b'OPTIONS'
+
+        result = ConfigResource("test_service").render_OPTIONS(request)
+
+        self.assertEqual(result, b'')
+        self.assertEqual(request.responseCode, 204)
+        self.assertEqual(
+            request.responseHeaders.getRawHeaders(b'Access-Control-Allow-Origin'), [b'*']
+        )
+
     def test_config_resource_creation(self):
         """Тест создания ресурса конфигурации."""
         service_name = "test_service"
@@ -61,6 +78,239 @@ features:
         self.assertFalse(is_valid)
         self.assertGreater(len(errors), 0)
 
+    def test_api_response_to_json(self):
+        """Тест сериализации ApiResponse."""
+        import json
+        from config_service.db.models import ApiResponse
+
+        body = ApiResponse(data={'message': 'Привет', 1: True}).to_json()
+        self.assertIsInstance(body, bytes)
+        self.assertEqual(json.loads(body), {'message': 'Привет', '1': True})
+
+        body = ApiResponse(error='Not found', status_code=404).to_json()
+        self.assertEqual(json.loads(body), {'error': 'Not found'})
+
+        # Предсериализованные данные отдаются как есть
+        raw = b'[{"version": 1, "created_at": "2025-08-19T12:00:00"}]'
+        self.assertEqual(ApiResponse(raw_json=raw).to_json(), raw)
+
+        # Даты отдаются в ISO формате
+        from datetime import datetime
+
+        body = ApiResponse(data={'created_at': datetime(2025, 8, 19, 12, 0, 0)}).to_json()
+        self.assertEqual(json.loads(body), {'created_at': '2025-08-19T12:00:00'})
+
+    def test_serialization_large_integers(self):
+        """Тест сериализации целых за пределами 64 бит."""
+        import json
+        from config_service.db.connection import _dumps_payload
+        from config_service.db.models import ApiResponse
+
+        payload = {'version': 1, 'limits': {'max_bytes': 100000000000000000000}}
+
+        self.assertEqual(json.loads(_dumps_payload(payload)), payload)
+        self.assertEqual(json.loads(ApiResponse(data=payload).to_json()), payload)
+
+    def test_from_json_filter_large_integers(self):
+        """Тест фильтра from_json: целые шире 64 бит не превращаются во float."""
+        from config_service.templates import TemplateRenderer
+
+        parsed = TemplateRenderer._from_json_filter('{"a": 100000000000000000001}')
+
+        self.assertEqual(parsed, {'a': 100000000000000000001})
+        self.assertIsInstance(parsed['a'], int)
+
+    def test_validation_cache(self):
+        """Тест кэширования результатов валидации YAML."""
+        from config_service.api.handlers import ConfigurationHandler
+
+        handler = ConfigurationHandler()
+        calls = []
+        original = handler.validator.validate_yaml_config
+
+        def counting_validate(yaml_content):
+            calls.append(yaml_content)
+            return original(yaml_content)
+
+        def counting_validate_async(yaml_content):
+            return defer.succeed(counting_validate(yaml_content))
+
+        handler.validator = type('V', (), {
+            'validate_yaml_config_async': staticmethod(counting_validate_async)
+        })()
+        yaml_content = "version: 1\nfeatures:\n  enable_auth: true\n"
+
+        is_valid, data, errors = self.successResultOf(handler._validate_cached(yaml_content))
+        self.assertTrue(is_valid)
+        data['features']['enable_auth'] = False
+
+        is_valid, cached_data, errors = self.successResultOf(handler._validate_cached(yaml_content))
+        self.assertTrue(is_valid)
+        self.assertEqual(len(calls), 1)
+        # Изменения вызывающего кода не должны попадать в кэш
+        self.assertTrue(cached_data['features']['enable_auth'])
+
+
+    def test_health_check_cache(self):
+        """Тест кэширования успешной проверки здоровья."""
+        from config_service.api.handlers import HealthHandler
+
+        queries = []
+
+        class FakePool:
+            def runQuery(self, sql):
+                queries.append(sql)
+                return defer.succeed([(1,)])
+
+        handler = HealthHandler()
+        handler.db = type('DB', (), {'dbpool': FakePool()})()
+
+        first = self.successResultOf(handler.check_health())
+        second = self.successResultOf(handler.check_health())
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIs(first, second)
+        self.assertEqual(len(queries), 1)
+
+
+    def test_get_configuration_cache_hit(self):
+        """Тест быстрого пути получения конфигурации из кэша."""
+        from config_service.api.handlers import ConfigurationHandler
+
+        class FakeDB:
+            def get_cached_configuration(self, service, version=None, raw=False):
+                return b'{"version": 1}' if raw else None
+
+        handler = ConfigurationHandler()
+        handler.db = FakeDB()
+
+        response = self.successResultOf(handler.get_configuration('test_service'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.to_json(), b'{"version": 1}')
+
+
+class TestReadCache(unittest.TestCase):
+    """Тесты кэша чтения конфигураций в DatabaseConnection."""
+
+    def setUp(self):
+        """Подключение без пула: запросы обслуживает FakePool."""
+        from config_service.db.connection import DatabaseConnection
+
+        self.patch(DatabaseConnection, '_setup_connection', lambda self: None)
+        self.queries = []
+        self.pending = []
+        # Ответы на save_cfg_next по очереди; пустой список - конфликт версии
+        self.next_results = []
+        self.db = DatabaseConnection()
+        self.db.dbpool = self
+
+    def runQuery(self, sql, params):
+        """FakePool: сохранение отвечает сразу, чтения - по команде теста."""
+        import datetime
+
+        self.queries.append(sql)
+        if sql.startswith('EXECUTE save_cfg_next') and self.next_results:
+            return defer.succeed(self.next_results.pop(0))
+        if sql.startswith('EXECUTE save_cfg'):
+            return defer.succeed([(1, 2, datetime.datetime(2025, 8, 19, 12, 0, 0))])
+        d = defer.Deferred()
+        self.pending.append(d)
+        return d
+
+    def _read_raw(self, service='svc', payload='{"version": 1}'):
+        """Читает raw конфигурацию, сразу отвечая на запрос к БД."""
+        d = self.db.get_configuration_raw(service)
+        if self.pending:
+            self.pending.pop().callback([(payload,)])
+        return self.successResultOf(d)
+
+    def test_cache_hit(self):
+        """Повторное чтение последней версии не обращается к БД."""
+        self.assertEqual(self._read_raw(), b'{"version": 1}')
+        self.assertEqual(self._read_raw(), b'{"version": 1}')
+        self.assertEqual(len(self.queries), 1)
+
+    def test_latest_version_ttl(self):
+        """Последняя версия устаревает по TTL."""
+        from config_service.config import config
+
+        self._read_raw()
+        self.patch(config, 'CONFIG_CACHE_TTL', -1)
+
+        self.assertIsNone(self.db.get_cached_configuration('svc', raw=True))
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняется давно не читавшаяся запись."""
+        from config_service.config import config
+
+        self.patch(config, 'CONFIG_CACHE_SIZE', 2)
+        self._read_raw('a')
+        self._read_raw('b')
+        self._read_raw('a')  # 'a' становится самой свежей
+        self._read_raw('c')
+
+        self.assertIsNotNone(self.db.get_cached_configuration('a', raw=True))
+        self.assertIsNone(self.db.get_cached_configuration('b', raw=True))
+        self.assertIsNotNone(self.db.get_cached_configuration('c', raw=True))
+
+    def test_invalidation_on_save(self):
+        """Сохранение сбрасывает закэшированную последнюю версию."""
+        self._read_raw()
+
+        self.successResultOf(self.db.save_configuration('svc', {'version': 2}))
+
+        self.assertIsNone(self.db.get_cached_configuration('svc', raw=True))
+
+    def test_read_in_flight_during_save(self):
+        """Чтение, начатое до сохранения, не кэширует старую версию."""
+        d = self.db.get_configuration_raw('svc')
+        self.successResultOf(self.db.save_configuration('svc', {'version': 2}))
+        self.pending.pop().callback([('{"version": 1}',)])
+
+        self.assertEqual(self.successResultOf(d), b'{"version": 1}')
+        self.assertIsNone(self.db.get_cached_configuration('svc', raw=True))
+
+    def test_auto_version_retry(self):
+        """Конфликт версии при автоназначении повторяется с новым MAX(version)."""
+        import datetime
+
+        self.next_results = [[], [(5, 7, datetime.datetime(2025, 8, 19, 12, 0, 0))]]
+
+        model = self.successResultOf(self.db.save_configuration('svc', {'features': {}}))
+
+        self.assertEqual(model.version, 7)
+        self.assertEqual(model.payload['version'], 7)
+        self.assertEqual(self.queries, ['EXECUTE save_cfg_next(%s, %s)'] * 2)
+
+    def test_auto_version_retries_exhausted(self):
+        """После SAVE_RETRIES конфликтов сохранение падает, а клиент получает 500."""
+        import io
+        import json
+        from twisted.web.server import NOT_DONE_YET
+        from config_service.db.connection import SAVE_RETRIES
+
+        self.next_results = [[] for _ in range(SAVE_RETRIES)]
+        self.failureResultOf(self.db.save_configuration('svc', {'features': {}}), RuntimeError)
+        self.assertEqual(len(self.queries), SAVE_RETRIES)
+
+        # Через API ошибка доходит до _handle_failure ресурса
+        self.next_results = [[] for _ in range(SAVE_RETRIES)]
+        validator = type('V', (), {'validate_yaml_config_async': staticmethod(
+            lambda yaml_content: defer.succeed((True, {'features': {}}, [])))})()
+        self.patch(config_handler, 'db', self.db)
+        self.patch(config_handler, 'validator', validator)
+        request = DummyRequest([b''])
+        request.method = b'POST'
+        request.content = io.BytesIO(b'features: {}\n')
+
+        self.assertEqual(ConfigResource('svc').render_POST(request), NOT_DONE_YET)
+
+        self.assertEqual(request.responseCode, 500)
+        body = json.loads(b''.join(request.written))
+        self.assertTrue(body['error'].startswith('Internal server error: '))
+        self.assertEqual(len(self.flushLoggedErrors(RuntimeError)), 1)
+
 
 if __name__ == '__main__':
     import sys
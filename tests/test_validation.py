@@ -2,6 +2,7 @@
 Тесты для модуля валидации.
 """
 import unittest
+from unittest import mock
 from config_service.validation import config_validator, YAMLValidator
 
 
@@ -43,6 +44,14 @@ database:
         self.assertIsNone(data)
         self.assertIsNotNone(error)
     
+    def test_quick_yaml_check(self):
+        """Тест быстрой проверки YAML без построения объектов."""
+        self.assertTrue(YAMLValidator.quick_yaml_check("version: 1\nfeatures: {a: true}\n"))
+        self.assertFalse(YAMLValidator.quick_yaml_check("- 1\n- 2\n"))
+        self.assertFalse(YAMLValidator.quick_yaml_check("a: 1\n---\nb: 2\n"))
+        self.assertFalse(YAMLValidator.quick_yaml_check("invalid: yaml: content:"))
+        self.assertFalse(YAMLValidator.quick_yaml_check(""))
+
     def test_empty_yaml(self):
         """Тест пустого YAML."""
         success, data, error = YAMLValidator.parse_yaml("")
@@ -50,7 +59,19 @@ database:
         self.assertFalse(success)
         self.assertIsNone(data)
         self.assertIsNotNone(error)
-    
+
+    def test_non_mapping_yaml(self):
+        """Тест быстрого отсева YAML, который не может быть словарем."""
+        self.assertEqual(YAMLValidator.parse_yaml("{a: 1}"), (True, {'a': 1}, None))
+        self.assertEqual(YAMLValidator.parse_yaml("? a\n"), (True, {'a': None}, None))
+
+        for content in ["plain scalar\n", "- 1\n- 2\n", "42"]:
+            success, data, error = YAMLValidator.parse_yaml(content)
+
+            self.assertFalse(success)
+            self.assertIsNone(data)
+            self.assertEqual(error, "YAML must represent a dictionary/object")
+
     def test_schema_validation(self):
         """Тест валидации схемы."""
         # Корректная конфигурация
@@ -81,6 +102,40 @@ database:
         self.assertFalse(is_valid)
         self.assertGreater(len(errors), 0)
 
+    def test_schema_validation_cache(self):
+        """Тест кэширования результатов проверки схемы."""
+        import datetime
+        from config_service.validation import schemas
+
+        config = {'version': 0, 'database': {'host': 'localhost', 'port': 5432}}
+        reordered = {'database': {'port': 5432, 'host': 'localhost'}, 'version': 0}
+
+        key = schemas._schema_cache_key(config)
+        self.assertIsNotNone(key)
+        self.assertEqual(key, schemas._schema_cache_key(reordered))
+
+        schemas._schema_cache.pop(key, None)
+        with mock.patch.object(schemas, 'validate_config_schema',
+                               wraps=schemas.validate_config_schema) as validate:
+            errors = schemas.get_validation_errors(config)
+            errors.append('caller change')
+
+            # Второй вызов - попадание в кэш, схема не проверяется заново
+            self.assertEqual(len(schemas.get_validation_errors(reordered)), 1)
+            self.assertEqual(validate.call_count, 1)
+
+        # Даты не отличить от строк в JSON - такие конфигурации не кэшируются
+        dated = {'version': 1, 'features': {'release': datetime.date(2025, 8, 19)}}
+        self.assertIsNone(schemas._schema_cache_key(dated))
+
+        # NaN и null в JSON одинаковы, но схема принимает только NaN
+        database = {'host': 'localhost', 'port': 5432}
+        with_nan = {'version': 1, 'database': database, 'features': {'x': float('nan')}}
+        with_null = {'version': 1, 'database': database, 'features': {'x': None}}
+        self.assertIsNone(schemas._schema_cache_key(with_nan))
+        self.assertEqual(schemas.get_validation_errors(with_nan), [])
+        self.assertEqual(len(schemas.get_validation_errors(with_null)), 1)
+
 
 class TestTemplateValidation(unittest.TestCase):
     """Тесты валидации шаблонов."""
@@ -113,6 +168,62 @@ class TestTemplateValidation(unittest.TestCase):
         
         has_templates = template_processor.has_template_syntax(config_without_template)
         self.assertFalse(has_templates)
+    
+    def test_template_rendering_cache(self):
+        """Тест повторного использования скомпилированного шаблона."""
+        from config_service.templates import TemplateRenderer
+        
+        renderer = TemplateRenderer()
+        config = {'version': 1, 'welcome_message': 'Hello {{ user }}!'}
+        hits = renderer._compile.cache_info().hits
+        
+        first = renderer.render_config_template(config, {'user': 'Alice'})
+        second = renderer.render_config_template(config, {'user': 'Bob'})
+        
+        self.assertEqual(first['welcome_message'], 'Hello Alice!')
+        self.assertEqual(second['welcome_message'], 'Hello Bob!')
+        self.assertEqual(renderer._compile.cache_info().hits, hits + 1)
+
+    def test_template_rendering_tree(self):
+        """Тест рендеринга вложенных строк без JSON преобразований."""
+        from config_service.templates import TemplateRenderer
+
+        renderer = TemplateRenderer()
+        config = {
+            'version': 2,
+            'servers': [{'name': '{{ env }}-db', 'port': 5432}, 'plain'],
+            'greeting': 'Say "{{ user }}"'
+        }
+
+        rendered = renderer.render_config_template(config, {'env': 'prod', 'user': 'O"Neil'})
+
+        self.assertEqual(rendered['version'], 2)
+        self.assertEqual(rendered['servers'], [{'name': 'prod-db', 'port': 5432}, 'plain'])
+        self.assertEqual(rendered['greeting'], 'Say "O"Neil"')
+
+    def test_extract_template_variables(self):
+        """Тест извлечения переменных шаблона."""
+        from config_service.templates import TemplateRenderer
+
+        renderer = TemplateRenderer()
+        config = {
+            'url': 'http://{{ host }}:{{ db.port }}',
+            'flags': ['{{ true }}', '{% if debug %}{{ level | upper }}{% endif %}'],
+            'static': 'no templates here'
+        }
+
+        variables = renderer.extract_template_variables(config)
+
+        self.assertEqual(variables, {'host', 'db', 'debug', 'level'})
+
+    def test_to_json_filter(self):
+        """Тест фильтра to_json для скаляров и составных значений."""
+        import json
+        from config_service.templates import TemplateRenderer
+
+        for value in ['plain', 'quote " and \\ slash', 'line\nbreak', True, None, 42, 1.5,
+                      {'hosts': ['a', 'b']}]:
+            self.assertEqual(json.loads(TemplateRenderer._to_json_filter(value)), value)
 
 
 if __name__ == '__main__':